@@ -1,10 +1,12 @@
+import io
 import os
 import psycopg2
 import psycopg2.extras
 import uuid
-import xml.etree.ElementTree as ET
-from typing import Dict, Optional, List
-import json
+from lxml import etree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, List, Tuple
+import orjson
 
 OSCAL_NS = 'http://csrc.nist.gov/ns/oscal/1.0'
 P_TAG = f'{{{OSCAL_NS}}}p'
@@ -12,9 +14,33 @@ INSERT_TAG = f'{{{OSCAL_NS}}}insert'
 PROP_TAG = f'{{{OSCAL_NS}}}prop'
 PART_TAG = f'{{{OSCAL_NS}}}part'
 PARAM_TAG = f'{{{OSCAL_NS}}}param'
+CONTROL_TAG = f'{{{OSCAL_NS}}}control'
+GROUP_TAG = f'{{{OSCAL_NS}}}group'
+RESOURCE_TAG = f'{{{OSCAL_NS}}}resource'
+METADATA_TAG = f'{{{OSCAL_NS}}}metadata'
+WITH_ID_TAG = f'{{{OSCAL_NS}}}with-id'
+INCLUDE_CONTROLS_TAG = f'{{{OSCAL_NS}}}include-controls'
 
 ns = {'oscal': OSCAL_NS}
 
+# Precompiled XPath expressions for the searches repeated across the catalog
+CONTROL_XPATH = ET.XPath('.//oscal:control', namespaces=ns)
+PART_XPATH = ET.XPath('.//oscal:part', namespaces=ns)
+PROP_XPATH = ET.XPath('.//oscal:prop', namespaces=ns)
+LINK_XPATH = ET.XPath('.//oscal:link', namespaces=ns)
+# Includes self so a single streamed <group> can be passed where the catalog root is expected
+GROUP_XPATH = ET.XPath('descendant-or-self::oscal:group', namespaces=ns)
+STATEMENT_XPATH = ET.XPath('oscal:part[@name="statement"]', namespaces=ns)
+
+# Number of rows sent per round-trip by execute_values / execute_batch
+BATCH_SIZE = 1000
+
+# Tables bulk-loaded through COPY into an unlogged staging_<table> copy
+STAGED_TABLES = ('parameters', 'parts', 'props', 'links')
+# uuid-keyed tables nothing references: their primary keys are dropped for the load and
+# rebuilt once afterwards, instead of updating the B-tree index on every inserted row
+BULK_KEYED_TABLES = {'parts': 'part_id', 'props': 'prop_id', 'links': 'link_id'}
+
 def setup_database(cur):
     """Create necessary tables in the database."""
     cur.execute('''
@@ -32,7 +58,7 @@ def setup_database(cur):
         control_id TEXT,
         label TEXT,
         guideline TEXT,
-        FOREIGN KEY(control_id) REFERENCES controls(control_id)
+        FOREIGN KEY(control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE
     )''')
     cur.execute('''
     CREATE TABLE IF NOT EXISTS parts (
@@ -41,7 +67,7 @@ def setup_database(cur):
         name TEXT,
         prose TEXT,
         "order" INTEGER,
-        FOREIGN KEY(control_id) REFERENCES controls(control_id)
+        FOREIGN KEY(control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE
     )''')
     cur.execute('''
     CREATE TABLE IF NOT EXISTS props (
@@ -50,7 +76,7 @@ def setup_database(cur):
         name TEXT,
         value TEXT,
         ns TEXT,
-        FOREIGN KEY(control_id) REFERENCES controls(control_id)
+        FOREIGN KEY(control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE
     )''')
     cur.execute('''
     CREATE TABLE IF NOT EXISTS links (
@@ -59,15 +85,15 @@ def setup_database(cur):
         href TEXT,
         rel TEXT,
         media_type TEXT,
-        FOREIGN KEY(control_id) REFERENCES controls(control_id)
+        FOREIGN KEY(control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE
     )''')
     cur.execute('''
     CREATE TABLE IF NOT EXISTS control_relations (
         parent_control_id TEXT,
         child_control_id TEXT,
         PRIMARY KEY (parent_control_id, child_control_id),
-        FOREIGN KEY(parent_control_id) REFERENCES controls(control_id),
-        FOREIGN KEY(child_control_id) REFERENCES controls(control_id)
+        FOREIGN KEY(parent_control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE,
+        FOREIGN KEY(child_control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE
     )''')
     cur.execute('''
     CREATE TABLE IF NOT EXISTS resources (
@@ -92,8 +118,8 @@ def setup_database(cur):
         baseline_id INTEGER,
         control_id TEXT,
         PRIMARY KEY (baseline_id, control_id),
-        FOREIGN KEY(baseline_id) REFERENCES baselines(baseline_id),
-        FOREIGN KEY(control_id) REFERENCES controls(control_id)
+        FOREIGN KEY(baseline_id) REFERENCES baselines(baseline_id) DEFERRABLE INITIALLY IMMEDIATE,
+        FOREIGN KEY(control_id) REFERENCES controls(control_id) DEFERRABLE INITIALLY IMMEDIATE
     )
     ''')
     cur.execute('''
@@ -106,42 +132,109 @@ def setup_database(cur):
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
+    # Constraint-free staging tables used as COPY targets before merging
+    for table in STAGED_TABLES:
+        cur.execute(f'CREATE UNLOGGED TABLE IF NOT EXISTS staging_{table} (LIKE {table} INCLUDING DEFAULTS)')
+    # Server-side prepared statements for the inserts still issued once per element,
+    # so PostgreSQL parses and plans them once per session instead of once per row
+    cur.execute('''
+    PREPARE controls_ins AS
+        INSERT INTO controls (control_id, catalog_id, class, title, label, statement)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (control_id) DO NOTHING
+    ''')
+    cur.execute('''
+    PREPARE resources_ins AS
+        INSERT INTO resources (uuid, title, location, citation)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (uuid) DO UPDATE SET
+            title = EXCLUDED.title,
+            location = EXCLUDED.location,
+            citation = EXCLUDED.citation
+    ''')
+    cur.execute('''
+    PREPARE control_families_ins AS
+        INSERT INTO control_families (family_code, family_name, description, updated_at)
+        VALUES ($1, $2, $3, NOW())
+        ON CONFLICT (family_code) DO NOTHING
+    ''')
+
+def drop_bulk_keys(cur):
+    """Drop the primary keys of BULK_KEYED_TABLES ahead of the bulk load."""
+    for table in BULK_KEYED_TABLES:
+        cur.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey')
+
+def restore_bulk_keys(cur):
+    """Rebuild the primary keys dropped by drop_bulk_keys, one sorted index build per table."""
+    for table, key in BULK_KEYED_TABLES.items():
+        cur.execute(f'ALTER TABLE {table} ADD PRIMARY KEY ({key})')
+
+# Backslash escapes for the characters COPY's text format treats specially inside a value
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def copy_value(value) -> str:
+    """Encode a value for COPY's text format; None becomes \\N, so '' stays an empty string."""
+    if value is None:
+        return '\\N'
+    return str(value).translate(COPY_ESCAPES)
+
+def copy_rows(cur, table: str, columns: List[str], rows: List[tuple]):
+    """Stream rows into staging_<table> with COPY, then merge them into the table."""
+    buf = io.StringIO()
+    buf.writelines('\t'.join(map(copy_value, row)) + '\n' for row in rows)
+    buf.seek(0)
+    column_list = ', '.join(columns)
+    cur.execute(f'TRUNCATE staging_{table}')
+    cur.copy_expert(f'COPY staging_{table} ({column_list}) FROM STDIN', buf)
+    cur.execute(f'''
+        INSERT INTO {table} ({column_list})
+        SELECT {column_list} FROM staging_{table}
+        ON CONFLICT DO NOTHING
+    ''')
+
+def clear_element(elem: ET._Element):
+    """Free a handled element and any already-processed siblings before it."""
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+def iter_catalog(xml_path: str):
+    """
+    Stream the top-level <group> and <resource> elements of a catalog with iterparse.
+    Each element is fully built when yielded and cleared once the caller is done with it,
+    so only one group (or resource) is held in memory at a time.
+    """
+    # Comments are dropped so text extraction matches the document content
+    for _, elem in ET.iterparse(xml_path, events=('end',), tag=(GROUP_TAG, RESOURCE_TAG), remove_comments=True):
+        # Nested groups are handled as part of their top-level group
+        if elem.tag == GROUP_TAG and elem.getparent().tag == GROUP_TAG:
+            continue
+        yield elem
+        clear_element(elem)
 
 def gen_id():
     return str(uuid.uuid4())
 
 def get_full_text(elem):
-    """Recursively get all text, including text in child tags and their tails."""
+    """Get all text, including text in child tags and their tails."""
     if elem is None:
         return ''
-    text = elem.text or ''
-    for child in elem:
-        text += get_full_text(child)
-        if child.tail:
-            text += child.tail
-    return text
-
-def build_control_param_map(root: ET.Element) -> Dict[str, str]:
-    """Build a mapping from param_id to its parent control_id."""
-    control_param_map = {}
-    for control in root.findall(f'.//{{{OSCAL_NS}}}control'):
-        control_id = control.get('id')
-        for param in control.findall(f'.//{PARAM_TAG}'):
-            param_id = param.get('id')
-            control_param_map[param_id] = control_id
-    return control_param_map
-
-def build_param_labels(
-    root: ET.Element,
-    control_param_map: Dict[str, str],
+    # Serialized by libxml2 in a single pass; the element's own tail is not part of its text
+    return ET.tostring(elem, method='text', encoding='unicode', with_tail=False)
+
+def build_param_tables(
+    root: ET._Element,
     cur,
     debug: bool = False
 ) -> Dict[str, str]:
-    """Build a dictionary of param_id to label and insert parameters into DB."""
+    """Build a dictionary of param_id to label and insert parameters into DB in a single pass."""
     param_labels = {}
-    for param in root.findall(f'.//{PARAM_TAG}'):
+    parameter_rows = []
+    for param in root.iter(PARAM_TAG):
         param_id = param.get('id')
-        parent_control_id = control_param_map.get(param_id)
+        # The owning control is the nearest enclosing <control>, read straight off the tree
+        parent_control = next(param.iterancestors(CONTROL_TAG), None)
+        parent_control_id = parent_control.get('id') if parent_control is not None else None
         label = None
         # 1. Try to get label from <label> element first
         label_elem = param.find(f'{{{OSCAL_NS}}}label')
@@ -183,54 +276,65 @@ def build_param_labels(
             if paragraphs:
                 guideline = " ".join(paragraphs)
 
-        # Insert parameter into the database
-        cur.execute('''
-            INSERT INTO parameters (parameter_id, control_id, label, guideline) 
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (parameter_id) DO NOTHING
-        ''', (param_id, parent_control_id, label, guideline))
+        parameter_rows.append((param_id, parent_control_id, label, guideline))
         if debug:
             print(f' {parent_control_id}: Inserting parameter {param_id} with label {label}, guideline: [ {guideline} ]')
+
+    # Insert all parameters with a single COPY rather than one round-trip per row
+    copy_rows(cur, 'parameters', ['parameter_id', 'control_id', 'label', 'guideline'], parameter_rows)
     return param_labels
 
-def get_label(part: ET.Element) -> Optional[str]:
-    """Get the label property from a part element."""
-    for child in part:
-        if child.tag == PROP_TAG and child.attrib.get('name') == 'label':
-            return child.attrib.get('value')
-    return None
+def load_param_labels(xml_path: str, cur, debug: bool = False) -> Dict[str, str]:
+    """Stream the catalog once to insert all parameters and collect their labels."""
+    param_labels = {}
+    for elem in iter_catalog(xml_path):
+        if elem.tag == GROUP_TAG:
+            param_labels.update(build_param_tables(elem, cur, debug))
+    return param_labels
 
-def parse_p(p_elem: ET.Element, param_labels: Dict[str, str]) -> str:
+def parse_p(p_elem: ET._Element, param_labels: Dict[str, str]) -> str:
     """Parse a <p> element, replacing <insert> with parameter labels."""
-    text = ""
+    # Collect the pieces and join once rather than growing a string node by node
+    parts = []
     for node in p_elem.iter():
         if node.tag == P_TAG:
             if node.text:
-                text += node.text
+                parts.append(node.text)
         elif node.tag == INSERT_TAG:
             param_id = node.attrib.get('id-ref')
             label = param_labels.get(param_id, f"<{param_id}>")
-            text += f"<{label}>"
+            parts.append(f"<{label}>")
         if node.tail is not None and '\n' not in node.tail:
-            text += node.tail
-    return text.strip()
+            parts.append(node.tail)
+    return ''.join(parts).strip()
 
 def parse_part(
-    part: ET.Element,
+    part: ET._Element,
     param_labels: Dict[str, str],
-    path: Optional[List[str]] = None,
+    path: Tuple[str, ...] = (),
     depth: int = 0
 ) -> List[Dict]:
     """Recursively parse <part> elements and return a list of fields."""
-    if path is None:
-        path = []
     fields = []
-    label = get_label(part)
     part_id = part.attrib.get('id')
     part_name = part.attrib.get('name')
-    current_path = path + [part_id] if part_id else path
+    # The path is never mutated, so an immutable tuple is shared by every field of this part
+    current_path = path + (part_id,) if part_id else path
 
-    for p_elem in part.findall(P_TAG):
+    # Sort the children in one pass: <p> text, nested <part>s and the label <prop>
+    label = None
+    p_children = []
+    part_children = []
+    for child in part:
+        tag = child.tag
+        if tag == P_TAG:
+            p_children.append(child)
+        elif tag == PART_TAG:
+            part_children.append(child)
+        elif tag == PROP_TAG and label is None and child.get('name') == 'label':
+            label = child.get('value')
+
+    for p_elem in p_children:
         field = {
             'path': current_path,
             'id': part_id,
@@ -241,39 +345,46 @@ def parse_part(
         }
         fields.append(field)
 
-    for child_part in part.findall(PART_TAG):
+    for child_part in part_children:
         fields.extend(parse_part(child_part, param_labels, current_path, depth + 1))
     return fields
 
-def insert_control(
-    cur,
-    cid: str,
-    group_id: str,
-    control_class: str,
-    title: str,
-    label_value: Optional[str],
-    combined_statement: Optional[str]
-):
-    """Insert a control into the database."""
-    cur.execute('''
-        INSERT INTO controls (control_id, catalog_id, class, title, label, statement) 
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT (control_id) DO NOTHING
-    ''', (cid, group_id, control_class, title, label_value, combined_statement))
+def insert_controls(cur, controls_rows: List[tuple]):
+    """Insert controls into the database, sending many prepared EXECUTEs per round-trip."""
+    psycopg2.extras.execute_batch(
+        cur,
+        'EXECUTE controls_ins (%s, %s, %s, %s, %s, %s)',
+        controls_rows,
+        page_size=BATCH_SIZE
+    )
 
 def parse_groups(
-    root: ET.Element,
+    root: ET._Element,
     cur,
     param_labels: Dict[str, str],
     debug: bool = False
 ):
     """Parse all groups and their controls, inserting into the database."""
-    for group in root.findall('.//oscal:group', ns):
+    write_group_rows(cur, collect_group_rows(root, param_labels, debug))
+
+def collect_group_rows(
+    root: ET._Element,
+    param_labels: Dict[str, str],
+    debug: bool = False
+) -> Dict[str, List[tuple]]:
+    """Parse all groups and their controls into rows per table, without touching the database."""
+    controls_rows = []
+    parts_rows = []
+    props_rows = []
+    links_rows = []
+    relations_rows = []
+
+    for group in GROUP_XPATH(root):
         group_id = group.get('id')
         group_title = group.findtext('oscal:title', default=None, namespaces=ns)
         print(f'Group ID: {group_id}, Title: {group_title}')
 
-        for control in group.findall('.//oscal:control', ns):
+        for control in CONTROL_XPATH(group):
             cid = control.get('id')
             control_class = control.attrib.get('class')
             title = control.findtext('oscal:title', default=None, namespaces=ns)
@@ -285,98 +396,120 @@ def parse_groups(
                     label_value = prop.get('value')
 
             # PARTS
-            for part in control.findall('.//oscal:part', ns):
+            for part in PART_XPATH(control):
                 part_id = gen_id()
                 name = part.get('name')
                 prose = part.findtext('oscal:prose', default=None, namespaces=ns)
                 order = part.attrib.get('order')
-                cur.execute('''
-                    INSERT INTO parts VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (part_id) DO NOTHING
-                ''', (part_id, cid, name, prose, order))
+                parts_rows.append((part_id, cid, name, prose, order))
 
             # PROPS
-            for prop in control.findall('.//oscal:prop', ns):
+            for prop in PROP_XPATH(control):
                 prop_id = gen_id()
                 name = prop.get('name')
                 value = prop.get('value')
                 propns = prop.get('ns')
-                cur.execute('''
-                    INSERT INTO props VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (prop_id) DO NOTHING
-                ''', (prop_id, cid, name, value, propns))
+                props_rows.append((prop_id, cid, name, value, propns))
 
             # LINKS
-            for link in control.findall('.//oscal:link', ns):
+            for link in LINK_XPATH(control):
                 link_id = gen_id()
                 href = link.get('href')
                 rel = link.get('rel')
                 media_type = link.get('media-type')
-                cur.execute('''
-                    INSERT INTO links VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (link_id) DO NOTHING
-                ''', (link_id, cid, href, rel, media_type))
+                links_rows.append((link_id, cid, href, rel, media_type))
 
             # RELATIONS (children/parent nesting)
-            for child in control.findall('.//oscal:control', ns):
+            for child in CONTROL_XPATH(control):
                 child_id = child.get('id')
-                cur.execute('''
-                    INSERT INTO control_relations VALUES (%s, %s)
-                    ON CONFLICT (parent_control_id, child_control_id) DO NOTHING
-                ''', (cid, child_id))
+                relations_rows.append((cid, child_id))
 
             # Control statement
-            for part in control.findall('oscal:part', ns):
-                if part.get('name') == 'statement':
-                    if debug:
-                        print(f'DEBUG: Getting control statement for part: {part.get("name")}, ID: {part.get("id")}')
-                    control_statement = []
-                    fields = parse_part(part, param_labels)
-                    for field in fields:
-                        label = field['label'] if field['label'] else ''
-                        text = field['text']
-                        indent = "    " * field['depth']
-                        line = f"{label} {text}".strip()
-                        control_statement.append(f"{indent}{line}")
-                    combined_statement = "\n".join(control_statement)
+            for part in STATEMENT_XPATH(control):
+                if debug:
+                    print(f'DEBUG: Getting control statement for part: {part.get("name")}, ID: {part.get("id")}')
+                control_statement = []
+                fields = parse_part(part, param_labels)
+                for field in fields:
+                    label = field['label'] if field['label'] else ''
+                    text = field['text']
+                    indent = "    " * field['depth']
+                    line = f"{label} {text}".strip()
+                    control_statement.append(f"{indent}{line}")
+                combined_statement = "\n".join(control_statement)
 
             print(f'Group {group_id} - Inserting control {cid} with class {control_class}, title: {title}, label: {label_value}')
-            insert_control(cur, cid, group_id, control_class, title, label_value, combined_statement)
+            controls_rows.append((cid, group_id, control_class, title, label_value, combined_statement))
+
+    return {
+        'controls': controls_rows,
+        'parts': parts_rows,
+        'props': props_rows,
+        'links': links_rows,
+        'control_relations': relations_rows,
+    }
+
+def write_group_rows(cur, rows: Dict[str, List[tuple]]):
+    """Write the rows from collect_group_rows, controls first so the others can reference them."""
+    insert_controls(cur, rows['controls'])
+    copy_rows(cur, 'parts', ['part_id', 'control_id', 'name', 'prose', '"order"'], rows['parts'])
+    copy_rows(cur, 'props', ['prop_id', 'control_id', 'name', 'value', 'ns'], rows['props'])
+    copy_rows(cur, 'links', ['link_id', 'control_id', 'href', 'rel', 'media_type'], rows['links'])
+    psycopg2.extras.execute_values(cur, '''
+        INSERT INTO control_relations (parent_control_id, child_control_id) VALUES %s
+        ON CONFLICT (parent_control_id, child_control_id) DO NOTHING
+    ''', rows['control_relations'], page_size=BATCH_SIZE)
+
+def submit_group(
+    writer: ThreadPoolExecutor,
+    cur,
+    pending: Optional[Future],
+    group: ET._Element,
+    param_labels: Dict[str, str],
+    debug: bool = False
+) -> Future:
+    """
+    Collect a group's rows on the calling thread and queue them on the writer thread.
+    Waits for the previous group's write first, so only one group's rows are in flight
+    and any error from that write is raised here.
+    """
+    rows = collect_group_rows(group, param_labels, debug)
+    if pending is not None:
+        pending.result()
+    return writer.submit(write_group_rows, cur, rows)
 
-def parse_resources(root: ET.Element, cur):
+def parse_resources(root: ET._Element, cur):
     """Parse and insert resources from <back-matter>."""
     back_matter = root.find('oscal:back-matter', ns)
     if back_matter is not None:
         for resource in back_matter.findall('oscal:resource', ns):
-            ruuid = resource.get('uuid')
-            # Try to get <title> and <rlink> (location) if present
-            title_elem = resource.find('oscal:title', ns)
-            title = title_elem.text.strip() if title_elem is not None and title_elem.text else None
-            location_elem = resource.find('oscal:rlink', ns)
-            location = location_elem.get('href') if location_elem is not None else None
-            # Get citation text if present
-            citation_elem = resource.find('oscal:citation', ns)
-            citation = None
-            if citation_elem is not None:
-                text_elem = citation_elem.find('oscal:text', ns)
-                if text_elem is not None:
-                    citation = get_full_text(text_elem).strip()
-                else:
-                    citation = get_full_text(citation_elem).strip()
-            cur.execute('''
-                INSERT INTO resources VALUES (%s, %s, %s, %s)
-                ON CONFLICT (uuid) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    location = EXCLUDED.location,
-                    citation = EXCLUDED.citation
-            ''', (ruuid, title, location, citation))
-            print(f'Inserted/updated resource uuid {ruuid}, title "{title}", location "{location}", citation "{citation}"')
-
-def populate_control_families(root: ET.Element, cur):
+            parse_resource(resource, cur)
+
+def parse_resource(resource: ET._Element, cur):
+    """Parse and insert a single <resource>."""
+    ruuid = resource.get('uuid')
+    # Try to get <title> and <rlink> (location) if present
+    title_elem = resource.find('oscal:title', ns)
+    title = title_elem.text.strip() if title_elem is not None and title_elem.text else None
+    location_elem = resource.find('oscal:rlink', ns)
+    location = location_elem.get('href') if location_elem is not None else None
+    # Get citation text if present
+    citation_elem = resource.find('oscal:citation', ns)
+    citation = None
+    if citation_elem is not None:
+        text_elem = citation_elem.find('oscal:text', ns)
+        if text_elem is not None:
+            citation = get_full_text(text_elem).strip()
+        else:
+            citation = get_full_text(citation_elem).strip()
+    cur.execute('EXECUTE resources_ins (%s, %s, %s, %s)', (ruuid, title, location, citation))
+    print(f'Inserted/updated resource uuid {ruuid}, title "{title}", location "{location}", citation "{citation}"')
+
+def populate_control_families(root: ET._Element, cur):
     """
     Populate the control_families table from <group class="family" id="..."><title>...</title></group>
     """
-    for group in root.findall('.//oscal:group', ns):
+    for group in GROUP_XPATH(root):
         group_class = group.get('class')
         family_code = group.get('id')
         family_name = group.findtext('oscal:title', default=None, namespaces=ns)
@@ -387,55 +520,56 @@ def populate_control_families(root: ET.Element, cur):
             overview_part = group.find('oscal:part[@name="overview"]', ns)
             if overview_part is not None:
                 description = overview_part.text
-            cur.execute('''
-                INSERT INTO control_families (family_code, family_name, description, updated_at)
-                VALUES (%s, %s, %s, NOW()  )
-                ON CONFLICT (family_code) DO NOTHING
-            ''', (family_code, family_name, description))
+            cur.execute('EXECUTE control_families_ins (%s, %s, %s)', (family_code, family_name, description))
 
 def parse_baseline_profile(profile_path: str, cur, baseline_name: str):
     """Parse a profile XML and insert the baseline and its controls, including title, last-modified, party details, and version."""
-    tree = ET.parse(profile_path)
-    root = tree.getroot()
-
     # Extract <title>, <last-modified>, <version> from metadata
     title = None
     last_modified = None
     version = None
     party_details = []
-
-    metadata = root.find('oscal:metadata', ns)
-    if metadata is not None:
-        title_elem = metadata.find('oscal:title', ns)
-        if title_elem is not None and title_elem.text:
-            title = title_elem.text.strip()
-        last_modified_elem = metadata.find('oscal:last-modified', ns)
-        if last_modified_elem is not None and last_modified_elem.text:
-            last_modified = last_modified_elem.text.strip()
-        version_elem = metadata.find('oscal:version', ns)
-        if version_elem is not None and version_elem.text:
-            version = version_elem.text.strip()
-        # Collect party details
-        for party in metadata.findall('oscal:party', ns):
-            party_info = {}
-            party_info['uuid'] = party.get('uuid')
-            party_info['type'] = party.get('type')
-            name_elem = party.find('oscal:name', ns)
-            if name_elem is not None and name_elem.text:
-                party_info['name'] = name_elem.text.strip()
-            email_elem = party.find('oscal:email-address', ns)
-            if email_elem is not None and email_elem.text:
-                party_info['email'] = email_elem.text.strip()
-            address_elem = party.find('oscal:address', ns)
-            if address_elem is not None:
-                address_lines = [al.text.strip() for al in address_elem.findall('oscal:addr-line', ns) if al.text]
-                city = address_elem.findtext('oscal:city', default='', namespaces=ns)
-                state = address_elem.findtext('oscal:state', default='', namespaces=ns)
-                postal = address_elem.findtext('oscal:postal-code', default='', namespaces=ns)
-                party_info['address'] = ', '.join(address_lines + [city, state, postal])
-            party_details.append(party_info)
+    control_ids = []
+
+    # Stream the profile rather than building the whole document
+    for _, elem in ET.iterparse(profile_path, events=('end',), tag=(METADATA_TAG, WITH_ID_TAG), remove_comments=True):
+        if elem.tag == WITH_ID_TAG:
+            # Only <with-id> elements under <include-controls>
+            if elem.getparent().tag == INCLUDE_CONTROLS_TAG:
+                control_ids.append(elem.text.strip())
+        else:
+            metadata = elem
+            title_elem = metadata.find('oscal:title', ns)
+            if title_elem is not None and title_elem.text:
+                title = title_elem.text.strip()
+            last_modified_elem = metadata.find('oscal:last-modified', ns)
+            if last_modified_elem is not None and last_modified_elem.text:
+                last_modified = last_modified_elem.text.strip()
+            version_elem = metadata.find('oscal:version', ns)
+            if version_elem is not None and version_elem.text:
+                version = version_elem.text.strip()
+            # Collect party details
+            for party in metadata.findall('oscal:party', ns):
+                party_info = {}
+                party_info['uuid'] = party.get('uuid')
+                party_info['type'] = party.get('type')
+                name_elem = party.find('oscal:name', ns)
+                if name_elem is not None and name_elem.text:
+                    party_info['name'] = name_elem.text.strip()
+                email_elem = party.find('oscal:email-address', ns)
+                if email_elem is not None and email_elem.text:
+                    party_info['email'] = email_elem.text.strip()
+                address_elem = party.find('oscal:address', ns)
+                if address_elem is not None:
+                    address_lines = [al.text.strip() for al in address_elem.findall('oscal:addr-line', ns) if al.text]
+                    city = address_elem.findtext('oscal:city', default='', namespaces=ns)
+                    state = address_elem.findtext('oscal:state', default='', namespaces=ns)
+                    postal = address_elem.findtext('oscal:postal-code', default='', namespaces=ns)
+                    party_info['address'] = ', '.join(address_lines + [city, state, postal])
+                party_details.append(party_info)
+        clear_element(elem)
     # Serialize party_details as a string (JSON-like)
-    party_details_str = json.dumps(party_details, ensure_ascii=False)
+    party_details_str = orjson.dumps(party_details).decode("utf-8")
 
     # Insert the baseline with extra info and get the ID back
     cur.execute('''
@@ -445,14 +579,12 @@ def parse_baseline_profile(profile_path: str, cur, baseline_name: str):
     ''', (baseline_name, title, last_modified, party_details_str, version))
     baseline_id = cur.fetchone()[0]
 
-    # Find all <with-id> elements under <include-controls>
-    for with_id in root.findall('.//oscal:include-controls/oscal:with-id', ns):
-        control_id = with_id.text.strip()
-        cur.execute('''
-            INSERT INTO baseline_controls (baseline_id, control_id) 
-            VALUES (%s, %s)
-            ON CONFLICT (baseline_id, control_id) DO NOTHING
-        ''', (baseline_id, control_id))
+    baseline_rows = [(baseline_id, control_id) for control_id in control_ids]
+    psycopg2.extras.execute_values(cur, '''
+        INSERT INTO baseline_controls (baseline_id, control_id)
+        VALUES %s
+        ON CONFLICT (baseline_id, control_id) DO NOTHING
+    ''', baseline_rows, page_size=BATCH_SIZE)
     print(f'Inserted baseline "{baseline_name}" with title "{title}", last-modified "{last_modified}", version "{version}", and {len(party_details)} party(ies).')
 
 def main():
@@ -470,18 +602,36 @@ def main():
     xml_path = os.path.join('xml', 'NIST_SP-800-53_rev5_catalog.xml')
     profile_path = os.path.join('xml', 'NIST_SP-800-53_rev5_MODERATE-baseline_profile.xml')
     
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
     with psycopg2.connect(**db_config) as conn:
         with conn.cursor() as cur:
             setup_database(cur)
-            # Populate control families
-            populate_control_families(root, cur)
-            #control_param_map = build_control_param_map(root)
-            #param_labels = build_param_labels(root, control_param_map, cur, debug)
-            #parse_groups(root, cur, param_labels, debug)
-            #parse_resources(root, cur)
+            # Check foreign keys once at commit instead of per row, and don't wait for the
+            # WAL flush on commit; the tables can always be reloaded from the XML
+            cur.execute('SET CONSTRAINTS ALL DEFERRED')
+            cur.execute('SET LOCAL synchronous_commit = off')
+            # First pass: parameters must be known before control statements are built
+            #param_labels = load_param_labels(xml_path, cur, debug)
+            # Second pass: handle each group/resource as soon as it has been parsed.
+            # Group rows are written by one background thread with its own cursor, so parsing
+            # the next group overlaps with the previous group's database round-trips.
+            # The parts/props/links primary keys are dropped for the group load and rebuilt after it
+            #drop_bulk_keys(cur)
+            with ThreadPoolExecutor(max_workers=1) as writer, conn.cursor() as writer_cur:
+                pending = None
+                for elem in iter_catalog(xml_path):
+                    if elem.tag == GROUP_TAG:
+                        # Populate control families
+                        populate_control_families(elem, cur)
+                        #pending = submit_group(writer, writer_cur, pending, elem, param_labels, debug)
+                    #else:
+                    #    parse_resource(elem, cur)
+                if pending is not None:
+                    pending.result()
+            # ALTER TABLE refuses tables with pending trigger events, so fire the foreign key
+            # checks queued by the group load before rebuilding the keys, then defer again
+            #cur.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            #restore_bulk_keys(cur)
+            #cur.execute('SET CONSTRAINTS ALL DEFERRED')
             # Parse and insert baseline controls from a profile
             #parse_baseline_profile(profile_path, cur, baseline_name="MODERATE")
             conn.commit()
@@ -5,7 +5,9 @@
 # Author: KyleGW
 # Date: 06-21-2025
 # 
-# Installation and Use note: Ensure pdfplumber is installed in your Python environment, you can install it via pip: pip install pdfplumber
+# Installation and Use note: Ensure PyMuPDF is installed in your Python environment, you can install it via pip: pip install pymupdf
+# PyMuPDF is licensed under the AGPL (this repo is MIT); set USE_PDFPLUMBER to True to avoid it entirely.
+# pdfplumber is only needed when USE_PDFPLUMBER is set to True: pip install pdfplumber
 # Usage: Adjust the PDF path and output CSV filename as needed in the example usage section at the bottom of the script.
 # Example: extract_controls_from_pdf("path/to/MARS-E-v2-2-Vol-2.pdf", "output/mars-e-controls-vol2.csv")
 # 
@@ -26,43 +28,89 @@
 ################################################
 
 
-import pdfplumber
 import csv
 import re
 from datetime import datetime
+from multiprocessing import Pool, cpu_count
+
+# PyMuPDF reads the page text straight from the content stream, which is much faster than
+# pdfplumber's character-level layout analysis. Set to True to extract with pdfplumber instead.
+USE_PDFPLUMBER = False
+
+# Regex patterns are compiled once here and reused for every line of every page
+
+# extract_detailed_controls: control ID, enhancements and applicability baseline.
+# Lines are not stripped first, so the patterns allow surrounding whitespace themselves.
+PATTERN_BASE = re.compile(r'^\s*([A-Z]{2}-\d{1,2})\s+–\s+(.*?)\s*$')
+PATTERN_ENHANCEMENT = re.compile(r'^\s*([A-Z]{2}-\d{1,2})\((\d+)\)\s+–\s+(.*?)\s*$')
+PATTERN_BASELINE = re.compile(r'Applicability\s*:\s*(LO)?\s*(MD)?', re.IGNORECASE)
+
+# normalize_control: CMS-specific (MP-CMS-1) and standard (AC-2 (1)) control labels
+PATTERN_CMS_CONTROL = re.compile(r'([A-Z]{2})-([A-Z]+)-(\d+)(?:\s+\((\d+)\))?')
+PATTERN_STANDARD_CONTROL = re.compile(r'([A-Z]{2}-\d+)(?:\s+\((\d+)\))?')
+
+# extract_controls_from_pdf: fixes for malformed table headings in a single pass (see fix_malformed),
+# then the control match. The PC-356 fix is listed first so it also wins over the "Table" prefix fix.
+PATTERN_MALFORMED = re.compile(
+    r'(?:Table\s+)?(?P<pc356>PC-356\.\s+)D-1\s+\('
+    r'|(?P<table_code>SC|PC)-Table\s+(?P<table_number>\d+)'
+    r'|Table\s+(?P<prefixed_code>(?:SC|PC)-\d+)\.'
+    r'|(?P<dotted_code>(?:SC|PC)-\d+)\.\s+(?=[A-Z]{2}-)'
+)
+PATTERN_CONTROL = re.compile(r'\b((SC|PC)-\d+)\.?\s+([A-Z]{2}-(?:[A-Z]+-)?[A-Z]*\d+(?: ?\(\d+\))?):\s+(.*?)(?:\s+\.{3,}\s+\d+)?$')
+
+def count_pages(pdf_path):
+    if USE_PDFPLUMBER:
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+def iter_page_text(pdf_path, start=0, end=None):
+    # Yield (1-based page number, page text) for each page of the PDF, or for pages [start, end)
+    if USE_PDFPLUMBER:
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[start:end]:
+                yield page.page_number, page.extract_text() or ''
+    else:
+        import fitz  # PyMuPDF
+        with fitz.open(pdf_path) as doc:
+            for page in doc.pages(start, end):
+                yield page.number + 1, page.get_text("text")
 
 def extract_detailed_controls(pdf_path, output_csv):
-    # Patterns to capture control ID and enhancements
-    pattern_base = re.compile(r'^([A-Z]{2}-\d{1,2})\s+–\s+(.*)')
-    pattern_enhancement = re.compile(r'^([A-Z]{2}-\d{1,2})\((\d+)\)\s+–\s+(.*)')
-    pattern_baseline = re.compile(r'Applicability\s*:\s*(LO)?\s*(MD)?', re.IGNORECASE)
-
-    rows = []
+    n_rows = 0
     current_id, current_title, current_type = None, None, 'base'
     description_lines = []
     baseline = []
 
     def flush_current():
+        nonlocal n_rows
         if current_id and current_title:
-            rows.append([
+            writer.writerow([
                 current_id,
                 '' if current_type == 'base' else current_id.split('(')[-1].rstrip(')'),
                 current_title,
                 ' '.join(description_lines).strip(),
                 ', '.join(baseline)
             ])
+            n_rows += 1
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            print(f"Processing page {page.page_number}...")
-            lines = page.extract_text().split('\n')
-            for line in lines:
-                line = line.strip()
+    # Export to CSV as each control is completed rather than buffering every row
+    with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Base Control ID', 'Enhancement Number', 'Title', 'Description', 'Baseline'])
 
+        for page_number, text in iter_page_text(pdf_path):
+            print(f"Processing page {page_number}...")
+            for line in text.splitlines():
                 # If a new base control starts, flush the old one
-                if pattern_base.match(line):
+                if PATTERN_BASE.match(line):
                     flush_current()
-                    match = pattern_base.match(line)
+                    match = PATTERN_BASE.match(line)
                     current_id = match.group(1)
                     current_title = match.group(2)
                     current_type = 'base'
@@ -71,9 +119,9 @@ def extract_detailed_controls(pdf_path, output_csv):
                     continue
 
                 # If a new enhancement starts, flush the previous block
-                elif pattern_enhancement.match(line):
+                elif PATTERN_ENHANCEMENT.match(line):
                     flush_current()
-                    match = pattern_enhancement.match(line)
+                    match = PATTERN_ENHANCEMENT.match(line)
                     current_id = f"{match.group(1)}({match.group(2)})"
                     current_title = match.group(3)
                     current_type = 'enhancement'
@@ -82,35 +130,29 @@ def extract_detailed_controls(pdf_path, output_csv):
                     continue
 
                 # Check for applicability baseline
-                elif pattern_baseline.search(line):
-                    match = pattern_baseline.search(line)
+                elif PATTERN_BASELINE.search(line):
+                    match = PATTERN_BASELINE.search(line)
                     baseline = [level for level in match.groups() if level]
                     continue
 
                 # Otherwise, treat as part of description
                 elif current_id:
-                    description_lines.append(line)
+                    description_lines.append(line.strip())
 
         flush_current()  # Final entry
 
-    # Export to CSV
-    with open(output_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Base Control ID', 'Enhancement Number', 'Title', 'Description', 'Baseline'])
-        writer.writerows(rows)
-
-    print(f"Extracted {len(rows)} controls and enhancements to {output_csv}")
+    print(f"Extracted {n_rows} controls and enhancements to {output_csv}")
 
 def normalize_control(code: str) -> str:
     # Handle special controls like MP-CMS-1, SC-ACA-2 (format: XX-YYY-Z)
-    match = re.match(r'([A-Z]{2})-([A-Z]+)-(\d+)(?:\s+\((\d+)\))?', code)
+    match = PATTERN_CMS_CONTROL.match(code)
     if match:
         base = f"{match.group(1).lower()}-{match.group(2).lower()}-{match.group(3)}"
         enhancement = match.group(4)
         return f"{base}.{enhancement}" if enhancement else base
     
     # Handle standard controls like AC-2 or AC-2 (1)
-    match = re.match(r'([A-Z]{2}-\d+)(?:\s+\((\d+)\))?', code)
+    match = PATTERN_STANDARD_CONTROL.match(code)
     if not match:
         return code.lower()  # fallback if pattern doesn't match
 
@@ -121,60 +163,89 @@ def normalize_control(code: str) -> str:
 
 
 
-def extract_controls_from_pdf(pdf_path, output_csv):
+def fix_malformed(match: re.Match) -> str:
+    # Pattern 4: Fix misspelled control "PC-356. D-1 (1):" -> "PC-356. DI-1 (1):"
+    if match.group('pc356'):
+        return f"{match.group('pc356')}DI-1 ("
+    # Pattern 1: "SC-Table 20. AC-20: ..." -> SC-20. AC-20: ...
+    if match.group('table_code'):
+        return f"{match.group('table_code')}-{match.group('table_number')}"
+    # Pattern 2: "Table SC-202. AC-1: ..." or "Table PC-348. AR-1: ..." -> SC-202. AC-1: ... or PC-348. AR-1: ...
+    if match.group('prefixed_code'):
+        return f"{match.group('prefixed_code')}."
+    # Pattern 3: Normalize the spacing after the SC/PC code "SC-301.  AC-" -> "SC-301. AC-"
+    return f"{match.group('dotted_code')}. "
+
+def extract_control_rows(page_range):
+    # Pool worker: extract the control rows from pages [start, end), in page order
+    pdf_path, start, end = page_range
     rows = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            if page.page_number > 0:
-                text = page.extract_text()
-                if not text:
+    for page_number, text in iter_page_text(pdf_path, start, end):
+        if page_number > 0:
+            if not text:
+                continue
+
+            for line in text.splitlines():
+                # Cheap checks before any regex work: a control heading always has a colon
+                # after the control label and starts with an SC/PC table code
+                if ':' not in line:
                     continue
-
-                lines = text.split('\n')
-                for line in lines:
-                    # Example: Detect control like "AC-2(1) – Account Management"
-                    #if line[:5].upper().startswith(('AC-', 'IA-', 'SC-', 'AU-', 'CM-', 'RA-', 'SA-', 'SI-', 'MP-', 'MA-')):
-                    if line[:8].startswith(('Table SC', 'Table PC', 'SC', 'PC')):    
-                        #print(f"Processing page {page.page_number} line: {line.strip()}")
-                        
-                        # Handle malformed patterns first
-                        # Pattern 1: "SC-Table 20. AC-20: ..." -> SC-20. AC-20: ...
-                        line = re.sub(r'(SC|PC)-Table\s+(\d+)', r'\1-\2', line)
-                        # Pattern 2: "Table SC-202. AC-1: ..." or "Table PC-348. AR-1: ..." -> SC-202. AC-1: ... or PC-348. AR-1: ...
-                        line = re.sub(r'Table\s+((SC|PC)-\d+)\.', r'\1.', line)
-                        # Pattern 3: Remove trailing period after SC/PC code "SC-301. AC-" -> "SC-301 AC-"
-                        line = re.sub(r'((SC|PC)-\d+)\.\s+([A-Z]{2}-)', r'\1. \3', line)
-                        # Pattern 4: Fix misspelled control "PC-356. D-1 (1):" -> "PC-356. DI-1 (1):"
-                        line = re.sub(r'(PC-356\.\s+)D-1\s+\(', r'\1DI-1 (', line)
-                        
-                        # Updated regex to handle:
-                        # - Standard controls: AC-2, AC-2 (1)
-                        # - CMS-specific controls: MP-CMS-1, SC-ACA-2
-                        # - Both SC (Security Control) and PC (Privacy Control) codes
-                        match = re.search(r'\b((SC|PC)-\d+)\.?\s+([A-Z]{2}-(?:[A-Z]+-)?[A-Z]*\d+(?: ?\(\d+\))?):\s+(.*?)(?:\s+\.{3,}\s+\d+)?$',line)
-                        if match:
-                            code_prefix = match.group(1)  # SC-123 or PC-348
-                            control_label = match.group(3)
-                            control_title = match.group(4)
-                            print(f"Processing page {page.page_number} - Matched Code: {code_prefix}, Control ID: {control_label}, Title: {control_title}")
-                            rows.append([code_prefix, normalize_control(control_label) ,control_label, control_title])
-
+                # Example: Detect control like "AC-2(1) – Account Management"
+                #if line[:5].upper().startswith(('AC-', 'IA-', 'SC-', 'AU-', 'CM-', 'RA-', 'SA-', 'SI-', 'MP-', 'MA-')):
+                if line.startswith(('Table SC', 'Table PC', 'SC-', 'PC-')):
+                    #print(f"Processing page {page_number} line: {line.strip()}")
+                    
+                    # Handle malformed patterns first, all in one scan of the line
+                    line = PATTERN_MALFORMED.sub(fix_malformed, line)
+                    
+                    # Updated regex to handle:
+                    # - Standard controls: AC-2, AC-2 (1)
+                    # - CMS-specific controls: MP-CMS-1, SC-ACA-2
+                    # - Both SC (Security Control) and PC (Privacy Control) codes
+                    match = PATTERN_CONTROL.search(line)
+                    if match:
+                        code_prefix = match.group(1)  # SC-123 or PC-348
+                        control_label = match.group(3)
+                        control_title = match.group(4)
+                        print(f"Processing page {page_number} - Matched Code: {code_prefix}, Control ID: {control_label}, Title: {control_title}")
+                        rows.append([code_prefix, normalize_control(control_label) ,control_label, control_title])
+    return rows
+
+def extract_controls_from_pdf(pdf_path, output_csv, processes=None):
+    # Each heading line is matched on its own, so pages can be split into contiguous ranges
+    # and extracted in parallel, one range per worker process
+    processes = processes or cpu_count()
+    page_count = count_pages(pdf_path)
+    chunk_size = max(1, -(-page_count // processes))
+    page_ranges = [
+        (pdf_path, start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+
+    n_rows = 0
     with open(output_csv, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(["Table Code",'Control ID','Control Label','Title'])
-        writer.writerows(rows)
-
-    print(f'Exported {len(rows)} controls to {output_csv}')
-
-# Example usage
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-output_filename = f"output\\mars-e-controls-vol2.1_{timestamp}.csv"
-extract_controls_from_pdf("docs\MARS-E-v2-2-Vol-2-AE-ACA-SSP_Final_08032021.pdf", output_filename) # type: ignore
-#extract_controls_from_pdf("docs\MARS-E v2-2-Vol-1_Final-Signed_08032021-1.pdf", "mars-e-controls-vol1.csv") # type: ignore
-
-# Examples
-print(normalize_control("AC-2 (1)"))  # Output: ac-2.1
-print(normalize_control("CM-3 (2)"))  # Output: cm-3.2
-print(normalize_control("IA-5"))      # Output: ia-5
-# Example usage:
-#extract_detailed_controls("MARS-E-v2-2-Vol-2-AE-ACA-SSP_Final_08032021.pdf", "mars-e-controls-and-enhancements.csv")
+
+        # imap hands back each range's rows in page order as soon as they are ready
+        with Pool(processes) as pool:
+            for rows in pool.imap(extract_control_rows, page_ranges):
+                writer.writerows(rows)
+                n_rows += len(rows)
+
+    print(f'Exported {n_rows} controls to {output_csv}')
+
+# Worker processes re-import this module on platforms that spawn them, so only run the examples here
+if __name__ == "__main__":
+    # Example usage
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_filename = f"output\\mars-e-controls-vol2.1_{timestamp}.csv"
+    extract_controls_from_pdf("docs\MARS-E-v2-2-Vol-2-AE-ACA-SSP_Final_08032021.pdf", output_filename) # type: ignore
+    #extract_controls_from_pdf("docs\MARS-E v2-2-Vol-1_Final-Signed_08032021-1.pdf", "mars-e-controls-vol1.csv") # type: ignore
+
+    # Examples
+    print(normalize_control("AC-2 (1)"))  # Output: ac-2.1
+    print(normalize_control("CM-3 (2)"))  # Output: cm-3.2
+    print(normalize_control("IA-5"))      # Output: ia-5
+    # Example usage:
+    #extract_detailed_controls("MARS-E-v2-2-Vol-2-AE-ACA-SSP_Final_08032021.pdf", "mars-e-controls-and-enhancements.csv")
@@ -1,22 +1,60 @@
 import os
 import sqlite3
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 
 # Load XML from local file in the xml directory
 xml_dir = 'xml'
 xml_file = 'NIST_SP-800-53_rev5_catalog.xml'
 xml_path = os.path.join(xml_dir, xml_file)
-tree = ET.parse(xml_path)
-root = tree.getroot()
 
-# Define the namespace dictionary
-ns = {'oscal': 'http://csrc.nist.gov/ns/oscal/1.0'}
+# Print every parsed part and resource (slow on the full catalog)
+debug = False
+
+# Define the OSCAL namespace
+OSCAL_NS = 'http://csrc.nist.gov/ns/oscal/1.0'
+# Clark-notation tags, so descendant searches use elem.iter(tag) rather than XPath
+CONTROL_TAG = f'{{{OSCAL_NS}}}control'
+PART_TAG = f'{{{OSCAL_NS}}}part'
+PROP_TAG = f'{{{OSCAL_NS}}}prop'
+LINK_TAG = f'{{{OSCAL_NS}}}link'
+RESOURCE_TAG = f'{{{OSCAL_NS}}}resource'
+# Child tags looked up on each resource with find(tag), skipping the prefixed-path parsing
+TITLE_TAG = f'{{{OSCAL_NS}}}title'
+RLINK_TAG = f'{{{OSCAL_NS}}}rlink'
+CITATION_TAG = f'{{{OSCAL_NS}}}citation'
+TEXT_TAG = f'{{{OSCAL_NS}}}text'
 
 # Create DB
-conn = sqlite3.connect('oscal_controls2.db')
+db_path = 'oscal_controls2.db'
+# Autocommit mode: transactions are opened explicitly below instead of implicitly per INSERT
+conn = sqlite3.connect(db_path, isolation_level=None)
 cur = conn.cursor()
 
+# Bulk-load settings: a rollback journal truncated rather than deleted at commit, no fsyncs,
+# a 64MB page cache, and an exclusive lock held for the whole run.
+# The journal is kept so a failed load rolls back and leaves the previous tables in place.
+# page_size only takes effect when the database file is first created.
+cur.executescript('''
+PRAGMA page_size=8192;
+PRAGMA journal_mode=TRUNCATE;
+PRAGMA synchronous=OFF;
+PRAGMA cache_size=-65536;
+PRAGMA locking_mode=EXCLUSIVE;
+''')
+
+# Load everything in one transaction, committed once at the end, so the old tables are
+# only replaced if the whole load succeeds
+cur.execute('BEGIN')
+
+# The tables this script loads are rebuilt from the XML on every run; any other tables
+# in the database are left alone
+for table in ('parts', 'props', 'links', 'control_relations', 'resources'):
+    cur.execute(f'DROP TABLE IF EXISTS {table}')
+
 # Create tables (add other tables as needed)
+# parts, props, links and control_relations are WITHOUT ROWID tables, clustered on their
+# key, so each row is stored once in the key's B-tree instead of in a rowid table plus a
+# separate key index
 cur.execute('''
 CREATE TABLE IF NOT EXISTS parts (
     part_id TEXT PRIMARY KEY,
@@ -25,7 +63,7 @@ CREATE TABLE IF NOT EXISTS parts (
     prose TEXT,
     "order" INTEGER,
     FOREIGN KEY(control_id) REFERENCES controls(control_id)
-)''')
+) WITHOUT ROWID''')
 
 cur.execute('''
 CREATE TABLE IF NOT EXISTS props (
@@ -35,7 +73,7 @@ CREATE TABLE IF NOT EXISTS props (
     value TEXT,
     ns TEXT,
     FOREIGN KEY(control_id) REFERENCES controls(control_id)
-)''')
+) WITHOUT ROWID''')
 
 cur.execute('''
 CREATE TABLE IF NOT EXISTS links (
@@ -45,7 +83,7 @@ CREATE TABLE IF NOT EXISTS links (
     rel TEXT,
     media_type TEXT,
     FOREIGN KEY(control_id) REFERENCES controls(control_id)
-)''')
+) WITHOUT ROWID''')
 
 cur.execute('''
 CREATE TABLE IF NOT EXISTS control_relations (
@@ -54,7 +92,20 @@ CREATE TABLE IF NOT EXISTS control_relations (
     PRIMARY KEY (parent_control_id, child_control_id),
     FOREIGN KEY(parent_control_id) REFERENCES controls(control_id),
     FOREIGN KEY(child_control_id) REFERENCES controls(control_id)
-)''')
+) WITHOUT ROWID''')
+
+# The clustered tables are filled from key-free temp staging tables in key order once the
+# catalog has been read, so rows are appended to their B-trees rather than inserted at random.
+# temp_store is left at its default so the staging tables can spill to a temp file instead of
+# holding the whole catalog in memory
+STAGED_TABLES = {
+    'parts': 'part_id',
+    'props': 'prop_id',
+    'links': 'link_id',
+    'control_relations': 'parent_control_id, child_control_id',
+}
+for table in STAGED_TABLES:
+    cur.execute(f'CREATE TEMP TABLE staging_{table} AS SELECT * FROM {table} LIMIT 0')
 
 cur.execute('''
 CREATE TABLE IF NOT EXISTS resources (
@@ -69,82 +120,150 @@ CREATE TABLE IF NOT EXISTS resources (
 
 import uuid
 
+# Random bytes for this many ids are read from the OS in one call instead of one read per id
+UUID_BATCH = 4096
+
+def iter_ids():
+    """Yield random (version 4) UUID strings, drawing the randomness in batches."""
+    while True:
+        rand = os.urandom(16 * UUID_BATCH)
+        for i in range(0, len(rand), 16):
+            yield str(uuid.UUID(bytes=rand[i:i + 16], version=4))
+
+_ids = iter_ids()
+
 def gen_id():
-    return str(uuid.uuid4())
+    return next(_ids)
 
 def get_full_text(elem):
-    """Recursively get all text, including text in child tags and their tails."""
+    """Get all text, including text in child tags and their tails."""
     if elem is None:
         return ''
-    text = elem.text or ''
-    for child in elem:
-        text += get_full_text(child)
-        if child.tail:
-            text += child.tail
-    return text
-
-for control in root.findall('.//oscal:control', ns):
-    cid = control.get('id')
+    # lxml collects the text of the whole subtree in C, without the element's own tail
+    return ET.tostring(elem, method='text', encoding='unicode', with_tail=False)
+
+# Rows are buffered here during the traversal and inserted with one executemany per table
+# whenever about BATCH_SIZE rows are waiting, so memory stays bounded as the catalog grows
+BATCH_SIZE = 1000
+parts_rows = []
+props_rows = []
+links_rows = []
+relations_rows = []
+resources_rows = []
+row_counts = {'parts': 0, 'props': 0, 'links': 0, 'control_relations': 0, 'resources': 0}
 
-    # PARTS
-    for part in control.findall('.//oscal:part', ns):
-        part_id = gen_id()
-        name = part.get('name')
-        prose = part.findtext('prose')
-        order = part.attrib.get('order')
-        cur.execute('INSERT OR IGNORE INTO parts VALUES (?, ?, ?, ?, ?)', 
-            (part_id, cid, name, prose, order))
-        print(f'Inserted part {part_id} for control {cid} with name "{name}" and prose "{prose}"')
-
-    # PROPS
-    for prop in control.findall('.//oscal:prop',ns):
-        prop_id = gen_id()
-        name = prop.get('name')
-        value = prop.get('value')
-        propns = prop.get('ns')
-        cur.execute('INSERT OR IGNORE INTO props VALUES (?, ?, ?, ?, ?)', 
-            (prop_id, cid, name, value, propns))
-
-    # LINKS
-    for link in control.findall('.//oscal:link', ns):
-        link_id = gen_id()
-        href = link.get('href')
-        rel = link.get('rel')
-        media_type = link.get('media-type')
-        cur.execute('INSERT OR IGNORE INTO links VALUES (?, ?, ?, ?, ?)', 
-            (link_id, cid, href, rel, media_type))
-
-    # RELATIONS (children/parent nesting)
-    for child in control.findall('.//oscal:control', ns):
-        child_id = child.get('id')
-        cur.execute('INSERT OR IGNORE INTO control_relations VALUES (?, ?)', 
-            (cid, child_id))
-
-
-# Add this after parsing the XML and before conn.commit()
-# Parse and insert resources from <back-matter>
-back_matter = root.find('oscal:back-matter', ns)
-if back_matter is not None:
-    for resource in back_matter.findall('oscal:resource', ns):
+# Insert statements used by flush_rows, kept together in one place
+SQL_INS_PART = 'INSERT INTO staging_parts VALUES (?, ?, ?, ?, ?)'
+SQL_INS_PROP = 'INSERT INTO staging_props VALUES (?, ?, ?, ?, ?)'
+SQL_INS_LINK = 'INSERT INTO staging_links VALUES (?, ?, ?, ?, ?)'
+SQL_INS_RELATION = 'INSERT INTO staging_control_relations VALUES (?, ?)'
+SQL_INS_RESOURCE = 'INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?)'
+
+def flush_rows():
+    """Insert the buffered rows and empty the buffers."""
+    cur.executemany(SQL_INS_PART, parts_rows)
+    cur.executemany(SQL_INS_PROP, props_rows)
+    cur.executemany(SQL_INS_LINK, links_rows)
+    cur.executemany(SQL_INS_RELATION, relations_rows)
+    cur.executemany(SQL_INS_RESOURCE, resources_rows)
+    for table, rows in (('parts', parts_rows), ('props', props_rows), ('links', links_rows),
+                        ('control_relations', relations_rows), ('resources', resources_rows)):
+        row_counts[table] += len(rows)
+        rows.clear()
+
+def buffered_rows():
+    return len(parts_rows) + len(props_rows) + len(links_rows) + len(relations_rows) + len(resources_rows)
+
+def clear_element(elem):
+    """Free a handled element and any already-processed siblings before it."""
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+# Stream the catalog instead of building the whole tree: each <control> and <resource> is
+# handled at its end tag, when its subtree is complete.
+# Comments are dropped and the id attribute table is not built, since neither is used
+for _, elem in ET.iterparse(
+    xml_path, events=('end',), tag=(CONTROL_TAG, RESOURCE_TAG),
+    remove_comments=True, collect_ids=False
+):
+    if elem.tag == RESOURCE_TAG:
+        # Parse resources from <back-matter>
+        resource = elem
         ruuid = resource.get('uuid')
         # Try to get <title> and <rlink> (location) if present
-        title_elem = resource.find('oscal:title', ns)
+        title_elem = resource.find(TITLE_TAG)
         title = title_elem.text.strip() if title_elem is not None and title_elem.text else None
-        location_elem = resource.find('oscal:rlink', ns)
+        location_elem = resource.find(RLINK_TAG)
         location = location_elem.get('href') if location_elem is not None else None
         # Get citation text if present
-        citation_elem = resource.find('oscal:citation', ns)
+        citation_elem = resource.find(CITATION_TAG)
         citation = None
         if citation_elem is not None:
-            text_elem = citation_elem.find('oscal:text', ns)
+            text_elem = citation_elem.find(TEXT_TAG)
             if text_elem is not None:
                 citation = get_full_text(text_elem).strip()
             else:
                 citation = get_full_text(citation_elem).strip()
-        cur.execute('INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?)', 
-            (ruuid, title, location, citation))
-        print(f'Inserted resource uuid {ruuid}, title \"{title}\", location \"{location}\", citation \"{citation}\"')
+        resources_rows.append((ruuid, title, location, citation))
+        if debug:
+            print(f'Inserted resource uuid {ruuid}, title \"{title}\", location \"{location}\", citation \"{citation}\"')
+        clear_element(resource)
+        if buffered_rows() >= BATCH_SIZE:
+            flush_rows()
+        continue
+
+    control = elem
+    cid = control.get('id')
+
+    # One walk over the subtree, dispatching on the tag, instead of one walk per row type
+    for node in control.iter(PART_TAG, PROP_TAG, LINK_TAG, CONTROL_TAG):
+        tag = node.tag
+        # PARTS
+        if tag == PART_TAG:
+            part_id = gen_id()
+            name = node.get('name')
+            prose = node.findtext('prose')
+            order = node.get('order')
+            parts_rows.append((part_id, cid, name, prose, order))
+            if debug:
+                print(f'Inserted part {part_id} for control {cid} with name "{name}" and prose "{prose}"')
+
+        # PROPS
+        elif tag == PROP_TAG:
+            prop_id = gen_id()
+            name = node.get('name')
+            value = node.get('value')
+            propns = node.get('ns')
+            props_rows.append((prop_id, cid, name, value, propns))
+
+        # LINKS
+        elif tag == LINK_TAG:
+            link_id = gen_id()
+            href = node.get('href')
+            rel = node.get('rel')
+            media_type = node.get('media-type')
+            links_rows.append((link_id, cid, href, rel, media_type))
+
+        # RELATIONS (children/parent nesting): direct children only, deeper controls are
+        # related to their own parent when that control is handled
+        elif node.getparent() is control:
+            child_id = node.get('id')
+            relations_rows.append((cid, child_id))
 
+    # Nested controls (enhancements) end before their parent and are still needed when the
+    # parent is handled, so only a top-level control frees its subtree
+    if control.getparent().tag != CONTROL_TAG:
+        clear_element(control)
+        if buffered_rows() >= BATCH_SIZE:
+            flush_rows()
 
+flush_rows()
+# Move the staged rows into the clustered tables in key order
+for table, key in STAGED_TABLES.items():
+    cur.execute(f'INSERT INTO {table} SELECT * FROM staging_{table} ORDER BY {key}')
+    cur.execute(f'DROP TABLE staging_{table}')
 conn.commit()
 conn.close()
+print(f'Inserted {row_counts["parts"]} parts, {row_counts["props"]} props, {row_counts["links"]} links, '
+      f'{row_counts["control_relations"]} control relations and {row_counts["resources"]} resources')